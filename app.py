@@ -1,9 +1,12 @@
 import os
-import subprocess
+import sys
 import json
 import secrets
 import logging
-from flask import Flask, render_template, request, jsonify
+import orjson
+from flask import Flask, Response, render_template, request
+
+import sfi_cli
 
 app = Flask(__name__)
 
@@ -14,62 +17,41 @@ logging.basicConfig(filename='flask_app.log', level=logging.INFO,
 # --- Configuration ---
 # Use environment variable or generate a random key
 app.secret_key = os.environ.get('FLASK_SECRET_KEY', secrets.token_hex(16))
-# Path to the backend CLI script
-SFI_CLI_PATH = os.path.join(os.path.dirname(__file__), "sfi_cli.py")
-# Python interpreter to use
-PYTHON_EXECUTABLE = "python3" # Or specify absolute path if needed
-
-# --- Helper Function to Run CLI ---
-def run_cli_command(command_args):
-    """Runs a command in the sfi_cli.py script and returns parsed JSON output."""
-    full_command = [PYTHON_EXECUTABLE, SFI_CLI_PATH] + command_args
-    app.logger.info(f"Executing CLI command: {' '.join(full_command)}")
+
+# --- JSON Responses ---
+def json_response(payload, status=200):
+    """Serializes payload with orjson into a JSON response."""
+    try:
+        body = orjson.dumps(payload)
+    except orjson.JSONEncodeError:
+        # orjson rejects integers beyond 64 bits (e.g. an oversized vector echoed back)
+        body = json.dumps(payload)
+    return Response(body, status=status, mimetype="application/json")
+
+# The prime map never changes, so its response body is serialized once
+PRIMES_RESPONSE_BODY = orjson.dumps({"success": True, "data": {"attributes": sfi_cli.ATTRIBUTE_GROUPS, "prime_map": sfi_cli.PRIME_MAP}})
+
+# --- Input Parsing ---
+def parse_vector_string(vector_str):
+    """Returns the int value of an ASCII digit string, or None if it can't be converted."""
+    if not (vector_str.isascii() and vector_str.isdigit()):
+        return None
     try:
-        # Increased timeout to 60 seconds for potentially long operations like large generations/filters
-        process = subprocess.run(
-            full_command,
-            capture_output=True,
-            text=True,
-            check=False, # Don't raise exception on non-zero exit code, handle it manually
-            timeout=60
-        )
-
-        stdout = process.stdout.strip()
-        stderr = process.stderr.strip()
-
-        if stderr:
-            app.logger.error(f"CLI Error Output: {stderr}")
-
-        if process.returncode != 0:
-            app.logger.error(f"CLI command failed with exit code {process.returncode}")
-            # Try to parse stdout for JSON error message from CLI, otherwise use stderr
-            try:
-                cli_result = json.loads(stdout)
-                if isinstance(cli_result, dict) and not cli_result.get('success', True):
-                    return cli_result # Return the error structure from CLI
-            except json.JSONDecodeError:
-                 pass # Ignore if stdout isn't valid JSON
-            # Fallback error message
-            return {"success": False, "error": f"CLI script failed. Error: {stderr or 'Unknown error'}", "details": stdout}
-
-        # Try parsing the JSON output from stdout
-        try:
-            result = json.loads(stdout)
-            app.logger.info(f"CLI command successful. Result: {result}")
-            return result
-        except json.JSONDecodeError as e:
-            app.logger.error(f"Failed to decode JSON from CLI output: {e}")
-            app.logger.error(f"CLI stdout was: {stdout}")
-            return {"success": False, "error": "Failed to parse response from backend script.", "details": stdout}
-
-    except subprocess.TimeoutExpired:
-        app.logger.error(f"CLI command timed out: {' '.join(full_command)}")
-        return {"success": False, "error": "Operation timed out."}
-    except FileNotFoundError:
-        app.logger.error(f"Error: {PYTHON_EXECUTABLE} or {SFI_CLI_PATH} not found.")
-        return {"success": False, "error": f"Backend script or Python interpreter not found."}
+        return int(vector_str)
+    except ValueError:
+        # int() refuses strings longer than sys.get_int_max_str_digits() (4300 by default)
+        return None
+
+# --- Helper Function to Run SFI Operations ---
+def run_sfi_operation(description, func, *args):
+    """Runs an sfi_cli function in-process and returns its result dictionary."""
+    app.logger.info(f"Executing SFI operation: {description}")
+    try:
+        result = func(*args)
+        app.logger.info(f"SFI operation finished. Success: {result.get('success', False)}")
+        return result
     except Exception as e:
-        app.logger.exception(f"An unexpected error occurred running CLI command: {e}")
+        app.logger.exception(f"An unexpected error occurred running SFI operation '{description}': {e}")
         return {"success": False, "error": f"An internal server error occurred: {e}"}
 
 # --- Flask Routes ---
@@ -81,60 +63,94 @@ def index():
 
 @app.route('/primes', methods=['GET'])
 def get_primes_map():
-    """Endpoint to get the prime map from the CLI."""
+    """Endpoint to get the prime map."""
     app.logger.info("Received request for /primes")
-    result = run_cli_command(["primes"])
-    return jsonify(result)
+    return Response(PRIMES_RESPONSE_BODY, mimetype="application/json")
 
 @app.route('/generate', methods=['POST'])
 def generate_data():
-    """Endpoint to trigger data generation via the CLI."""
+    """Endpoint to trigger data generation."""
     app.logger.info("Received request for /generate")
     count = request.form.get('count', '100') # Get count from form data
-    if not count.isdigit() or int(count) <= 0:
+    if not (count.isascii() and count.isdigit()) or int(count) <= 0:
         app.logger.warning(f"Invalid count received for generation: {count}")
-        return jsonify({"success": False, "error": "Invalid count specified. Must be a positive integer."}), 400
+        return json_response({"success": False, "error": "Invalid count specified. Must be a positive integer."}, 400)
 
-    result = run_cli_command(["generate", "--count", count])
-    return jsonify(result)
+    result = run_sfi_operation(f"generate count={count}", sfi_cli.generate_shipment_data, int(count))
+    return json_response(result)
 
 @app.route('/filter', methods=['POST'])
 def filter_data():
-    """Endpoint to trigger data filtering via the CLI."""
+    """Endpoint to trigger data filtering."""
     app.logger.info("Received request for /filter")
     criteria_json = request.form.get('criteria')
     if not criteria_json:
         app.logger.warning("Filter request received with no criteria.")
-        return jsonify({"success": False, "error": "No filter criteria provided."}), 400
+        return json_response({"success": False, "error": "No filter criteria provided."}, 400)
 
     # Basic validation: Check if it's likely JSON
     try:
         json.loads(criteria_json) # Test if it parses
     except json.JSONDecodeError:
         app.logger.warning(f"Invalid JSON received for filter criteria: {criteria_json}")
-        return jsonify({"success": False, "error": "Invalid JSON format for criteria."}), 400
+        return json_response({"success": False, "error": "Invalid JSON format for criteria."}, 400)
 
-    result = run_cli_command(["filter", "--criteria", criteria_json])
-    return jsonify(result)
+    result = run_sfi_operation(f"filter criteria={criteria_json}", sfi_cli.filter_shipment_data, criteria_json)
+    return json_response(result)
 
 @app.route('/decode', methods=['POST'])
 def decode_vector():
-    """Endpoint to trigger SFI vector decoding via the CLI."""
+    """Endpoint to trigger SFI vector decoding."""
     app.logger.info("Received request for /decode")
     vector_str = request.form.get('vector')
     if not vector_str:
         app.logger.warning("Decode request received with no vector.")
-        return jsonify({"success": False, "error": "No SFI vector provided."}), 400
-
-    if not vector_str.isdigit() or int(vector_str) <= 0:
-        app.logger.warning(f"Invalid vector received for decoding: {vector_str}")
-        return jsonify({"success": False, "error": "Invalid vector specified. Must be a positive integer."}), 400
-
-    result = run_cli_command(["decode", "--vector", vector_str])
-    return jsonify(result)
+        return json_response({"success": False, "error": "No SFI vector provided."}, 400)
+
+    vector = parse_vector_string(vector_str)
+    if vector is None or vector <= 0:
+        app.logger.warning(f"Invalid vector received for decoding: {vector_str[:100]}")
+        return json_response({"success": False, "error": "Invalid vector specified. Must be a positive integer."}, 400)
+
+    result = run_sfi_operation(f"decode vector={vector}", sfi_cli.decode_vector_result, vector)
+    return json_response(result)
+
+@app.route('/filter_batch', methods=['POST'])
+def filter_data_batch():
+    """Endpoint to run several filter criteria over the shipments in one request."""
+    app.logger.info("Received request for /filter_batch")
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict) or not isinstance(payload.get('criteria'), list):
+        app.logger.warning("Filter batch request received without a 'criteria' list.")
+        return json_response({"success": False, "error": "Request body must be JSON with a 'criteria' list."}, 400)
+
+    criteria_list = payload['criteria']
+    result = run_sfi_operation(f"filter_batch size={len(criteria_list)}", sfi_cli.filter_shipment_data_batch, criteria_list)
+    return json_response(result)
+
+@app.route('/decode_batch', methods=['POST'])
+def decode_vector_batch():
+    """Endpoint to decode several SFI vectors in one request."""
+    app.logger.info("Received request for /decode_batch")
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict) or not isinstance(payload.get('vectors'), list):
+        app.logger.warning("Decode batch request received without a 'vectors' list.")
+        return json_response({"success": False, "error": "Request body must be JSON with a 'vectors' list."}, 400)
+
+    # Accept vectors as JSON numbers or ASCII digit strings; anything else is left as-is
+    # and reported per item
+    vectors = []
+    for v in payload['vectors']:
+        parsed = parse_vector_string(v) if isinstance(v, str) else None
+        vectors.append(v if parsed is None else parsed)
+    result = run_sfi_operation(f"decode_batch size={len(vectors)}", sfi_cli.decode_vector_batch_result, vectors)
+    return json_response(result)
 
 # --- Main Execution Guard ---
 if __name__ == '__main__':
+    # Production serving goes through gunicorn (see gunicorn.conf.py); the dev server is opt-in
+    if not os.environ.get('FLASK_DEV'):
+        sys.exit("Serve the app with 'gunicorn -c gunicorn.conf.py app:app', or set FLASK_DEV=1 to run the development server.")
     app.logger.info("Starting Flask development server.")
     # Use host='0.0.0.0' to make it accessible on the network if needed
     # Debug=True is useful for development, but should be False in production
@@ -0,0 +1,23 @@
+# Gunicorn configuration for the SFI web app.
+# Usage: gunicorn -c gunicorn.conf.py app:app
+#
+# Each worker process imports sfi_cli and keeps its own shipments cache and decode
+# cache; shipments.npy is memory-mapped, so workers share its pages through the OS.
+# Requests within a worker run on threads. Only the NumPy bitmask scan releases the GIL;
+# decoding, building result dicts and JSON serialization are pure Python and run one
+# thread at a time per worker. Threads mainly hide I/O and keep-alive waits, so scale
+# CPU-bound throughput with GUNICORN_WORKERS rather than GUNICORN_THREADS.
+#
+# All workers append to the same sfi_cli.log. Rotate it externally (e.g. logrotate with
+# plain move-and-create); each worker's WatchedFileHandler reopens the file after a move.
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("GUNICORN_WORKERS", "2"))
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", "4"))
+
+# Keep connections from the dashboard open between polls
+keepalive = 30
+# Matches the old per-command CLI timeout for large generations/filters
+timeout = 60
@@ -2,40 +2,55 @@
 
 import argparse
 import json
-import random
 import sys
 import math
+import functools
 import time
 import os
+import threading
+import tempfile
+import logging
+from logging.handlers import WatchedFileHandler
+
+import numpy as np
+import orjson
 
 # --- Constants ---
-SHIPMENTS_FILE = "shipments.json"
+SHIPMENTS_FILE = "shipments.npy"
 LOG_FILE = "sfi_cli.log" # Added basic logging
 
 # --- Logging Setup ---
+# Configured once at import; the handler keeps LOG_FILE open instead of reopening it per message.
+# Several gunicorn workers append to the same file, so rotation is left to an external tool
+# (e.g. logrotate); WatchedFileHandler reopens LOG_FILE once it has been moved away.
+logger = logging.getLogger("sfi_cli")
+if not logger.handlers:
+    _log_handler = WatchedFileHandler(LOG_FILE, delay=True)
+    _log_handler.setFormatter(logging.Formatter("%(asctime)s - %(message)s", datefmt="%Y-%m-%d %H:%M:%S"))
+    logger.addHandler(_log_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False # Keep CLI messages out of the Flask app's root log
+
 def log_message(message):
     """Appends a timestamped message to the log file."""
-    try:
-        with open(LOG_FILE, "a") as f:
-            f.write(f"{time.strftime('%Y-%m-%d %H:%M:%S')} - {message}\n")
-    except Exception as e:
-        print(f"Error writing to log file {LOG_FILE}: {e}", file=sys.stderr)
+    logger.info(message)
 
 # --- Prime Number Generation ---
 def get_primes(count):
-    """Generates a list of the first 'count' prime numbers."""
-    primes = []
-    num = 2
-    while len(primes) < count:
-        is_prime = True
-        for i in range(2, int(math.sqrt(num)) + 1):
-            if num % i == 0:
-                is_prime = False
-                break
-        if is_prime:
-            primes.append(num)
-        num += 1
-    return primes
+    """Generates a list of the first 'count' prime numbers using a Sieve of Eratosthenes."""
+    if count <= 0:
+        return []
+    # Upper bound on the count-th prime (Rosser's theorem), valid for count >= 6
+    if count < 6:
+        limit = 15
+    else:
+        limit = int(count * (math.log(count) + math.log(math.log(count)))) + 10
+    sieve = bytearray(limit) # 0 = prime candidate, 1 = composite
+    sieve[0] = sieve[1] = 1
+    for i in range(2, math.isqrt(limit - 1) + 1):
+        if not sieve[i]:
+            sieve[i * i::i] = b"\x01" * len(range(i * i, limit, i))
+    return [i for i, composite in enumerate(sieve) if not composite][:count]
 
 # --- SFI Core Data ---
 ATTRIBUTE_GROUPS = {
@@ -48,7 +63,10 @@ ATTRIBUTE_GROUPS = {
 
 # --- Prime Map Generation ---
 def generate_prime_map():
-    """Assigns unique prime numbers to each attribute value."""
+    """Assigns unique prime numbers to each attribute value.
+
+    Used to regenerate the static PRIME_MAP / REVERSE_PRIME_MAP tables below.
+    """
     prime_map = {}
     reverse_prime_map = {}
     total_values = sum(len(values) for values in ATTRIBUTE_GROUPS.values())
@@ -65,7 +83,44 @@ def generate_prime_map():
 
     return prime_map, reverse_prime_map
 
-PRIME_MAP, REVERSE_PRIME_MAP = generate_prime_map()
+# Static output of generate_prime_map() for ATTRIBUTE_GROUPS, baked in so the
+# primes are not recomputed on every import. Regenerate if ATTRIBUTE_GROUPS changes.
+PRIME_MAP = {
+    "origin": {"New York": 2, "Los Angeles": 3, "Chicago": 5, "Houston": 7, "Miami": 11},
+    "destination": {"London": 13, "Tokyo": 17, "Paris": 19, "Sydney": 23, "Berlin": 29},
+    "carrier": {"PrimeShip": 31, "SwiftLog": 37, "GlobalEx": 41, "CargoFast": 43},
+    "status": {"Pending": 47, "In Transit": 53, "Delivered": 59, "Delayed": 61, "Customs Hold": 67},
+    "priority": {"Standard": 71, "Express": 73, "Overnight": 79},
+}
+REVERSE_PRIME_MAP = {
+    2: {"group": "origin", "value": "New York"},
+    3: {"group": "origin", "value": "Los Angeles"},
+    5: {"group": "origin", "value": "Chicago"},
+    7: {"group": "origin", "value": "Houston"},
+    11: {"group": "origin", "value": "Miami"},
+    13: {"group": "destination", "value": "London"},
+    17: {"group": "destination", "value": "Tokyo"},
+    19: {"group": "destination", "value": "Paris"},
+    23: {"group": "destination", "value": "Sydney"},
+    29: {"group": "destination", "value": "Berlin"},
+    31: {"group": "carrier", "value": "PrimeShip"},
+    37: {"group": "carrier", "value": "SwiftLog"},
+    41: {"group": "carrier", "value": "GlobalEx"},
+    43: {"group": "carrier", "value": "CargoFast"},
+    47: {"group": "status", "value": "Pending"},
+    53: {"group": "status", "value": "In Transit"},
+    59: {"group": "status", "value": "Delivered"},
+    61: {"group": "status", "value": "Delayed"},
+    67: {"group": "status", "value": "Customs Hold"},
+    71: {"group": "priority", "value": "Standard"},
+    73: {"group": "priority", "value": "Express"},
+    79: {"group": "priority", "value": "Overnight"},
+}
+SORTED_PRIMES = tuple(sorted(REVERSE_PRIME_MAP))
+# Bit position of each attribute prime in the bitmask form of an SFI vector
+PRIME_BIT_INDEX = {prime: idx for idx, prime in enumerate(SORTED_PRIMES)}
+_PRIMES_ARRAY = np.array(SORTED_PRIMES, dtype=np.uint64)
+_PRIME_BITS_ARRAY = np.array([1 << idx for idx in range(len(SORTED_PRIMES))], dtype=np.uint32)
 
 # --- SFI Encoding ---
 def encode_shipment(shipment_details):
@@ -84,28 +139,61 @@ def encode_shipment(shipment_details):
         return None # Indicate encoding failure
     return sfi_vector
 
-# --- SFI Decoding ---
-def decode_sfi_vector(sfi_vector):
-    """Decodes an SFI vector back into human-readable attributes."""
-    if not isinstance(sfi_vector, int) or sfi_vector <= 0:
-        return {"error": "Invalid SFI vector provided. Must be a positive integer."}
-
-    decoded_attributes = {}
-    temp_vector = sfi_vector
+def sfi_vector_to_bitmask(sfi_vector):
+    """Converts an SFI vector into a bitmask with bit PRIME_BIT_INDEX[p] set for each attribute prime p dividing it."""
+    bitmask = 0
+    for prime in SORTED_PRIMES:
+        if sfi_vector % prime == 0:
+            bitmask |= 1 << PRIME_BIT_INDEX[prime]
+    return bitmask
 
-    # Iterate through primes in reverse map (efficiency might depend on map size vs vector size)
-    # A more robust approach for large vectors might involve trial division with known primes.
-    sorted_primes = sorted(REVERSE_PRIME_MAP.keys())
+def sfi_vectors_to_bitmasks(sfi_vectors):
+    """Converts a sequence of SFI vectors into a uint32 array of bitmasks."""
+    try:
+        vectors = np.array(sfi_vectors, dtype=np.uint64)
+    except OverflowError:
+        # Products beyond 64 bits: fall back to per-vector Python ints
+        return np.fromiter((sfi_vector_to_bitmask(v) for v in sfi_vectors), dtype=np.uint32, count=len(sfi_vectors))
+    # One prime at a time keeps temporaries to ~9 bytes per row instead of an (n, primes) matrix
+    bitmasks = np.zeros(len(vectors), dtype=np.uint32)
+    for prime, bit in zip(_PRIMES_ARRAY, _PRIME_BITS_ARRAY):
+        bitmasks[(vectors % prime) == 0] |= bit
+    return bitmasks
 
-    for prime in sorted_primes:
-        if temp_vector % prime == 0:
-            attribute_info = REVERSE_PRIME_MAP[prime]
-            decoded_attributes[attribute_info["group"]] = attribute_info["value"]
-            # Keep dividing by the prime factor until it's no longer divisible
-            while temp_vector % prime == 0:
-                 temp_vector //= prime
-            if temp_vector == 1:
-                 break # All factors found
+# --- SFI Decoding ---
+def _build_unrolled_decoder():
+    """Generates a straight-line decoder with every attribute prime inlined as a literal.
+
+    The generated function maps a vector to (decoded_attributes, remainder), dividing out
+    each known prime in ascending order and returning as soon as the remainder reaches 1.
+    """
+    lines = ["def _decode_unrolled(v):", "    out = {}"]
+    for prime in SORTED_PRIMES:
+        attribute_info = REVERSE_PRIME_MAP[prime]
+        lines += [
+            f"    if v % {prime} == 0:",
+            f"        out[{attribute_info['group']!r}] = {attribute_info['value']!r}",
+            f"        v //= {prime}",
+            f"        while v % {prime} == 0:",
+            f"            v //= {prime}",
+            "        if v == 1:",
+            "            return out, v",
+        ]
+    lines.append("    return out, v")
+    namespace = {}
+    exec("\n".join(lines), namespace)
+    return namespace["_decode_unrolled"]
+
+_decode_unrolled = _build_unrolled_decoder()
+
+@functools.lru_cache(maxsize=4096)
+def _decode_sfi_vector_cached(sfi_vector):
+    """Decodes a validated SFI vector into a tuple of (key, value) pairs.
+
+    Decoding is a pure function of the vector, so results are memoized; repeated
+    vectors (and their warnings) are only computed and logged once.
+    """
+    decoded_attributes, temp_vector = _decode_unrolled(sfi_vector)
 
     if temp_vector != 1:
         # This indicates the vector had factors not in our prime map
@@ -119,39 +207,124 @@ def decode_sfi_vector(sfi_vector):
         if group not in decoded_attributes:
             decoded_attributes[group] = "Unknown"
 
+    return tuple(decoded_attributes.items())
 
-    return decoded_attributes
+def decode_sfi_vector(sfi_vector):
+    """Decodes an SFI vector back into human-readable attributes."""
+    if not isinstance(sfi_vector, int) or isinstance(sfi_vector, bool) or sfi_vector <= 0:
+        return {"error": "Invalid SFI vector provided. Must be a positive integer."}
+    return dict(_decode_sfi_vector_cached(sfi_vector))
+
+def decode_sfi_vectors(sfi_vectors):
+    """Decodes many SFI vectors, returning the same dicts as decode_sfi_vector.
+
+    Each distinct vector is looked up once per batch and its result copied to the
+    repeats, which saves the repeated cache lookups and tuple-to-dict conversions.
+    """
+    decoded_by_vector = {}
+    decoded = []
+    for sfi_vector in sfi_vectors:
+        # Only plain ints are deduplicated; bools and invalid input are reported by decode_sfi_vector
+        if type(sfi_vector) is not int:
+            decoded.append(decode_sfi_vector(sfi_vector))
+            continue
+        decoded_attributes = decoded_by_vector.get(sfi_vector)
+        if decoded_attributes is None:
+            decoded_attributes = decoded_by_vector[sfi_vector] = decode_sfi_vector(sfi_vector)
+        decoded.append(dict(decoded_attributes))
+    return decoded
+
+def _wrap_decode_result(sfi_vector, decoded_data):
+    """Wraps decoded attributes in the standard result structure."""
+    if "error" in decoded_data:
+        return {"success": False, "error": decoded_data["error"], "vector": sfi_vector}
+    return {"success": True, "vector": sfi_vector, "decoded": decoded_data}
+
+def decode_vector_result(sfi_vector):
+    """Decodes an SFI vector and wraps it in the standard result structure."""
+    return _wrap_decode_result(sfi_vector, decode_sfi_vector(sfi_vector))
+
+def decode_vector_results(sfi_vectors):
+    """Decodes many SFI vectors and wraps each in the standard result structure."""
+    return [_wrap_decode_result(v, d) for v, d in zip(sfi_vectors, decode_sfi_vectors(sfi_vectors))]
+
+def decode_vector_batch_result(sfi_vectors):
+    """Decodes many SFI vectors and returns the batch result structure."""
+    log_message(f"Starting batch decoding of {len(sfi_vectors)} vectors.")
+    start_time = time.time()
+    results = decode_vector_results(sfi_vectors)
+    end_time = time.time()
+    duration = end_time - start_time
+    failed = sum(1 for result in results if not result["success"])
+    log_message(f"Batch decoding complete. Decoded {len(results) - failed} vectors, {failed} invalid. Took {duration:.2f}s.")
+    return {"success": True, "results": results, "duration_seconds": duration}
 
 # --- Data Generation ---
+# Mode for newly created data files: 0666 masked by the process umask, read once at import
+# since os.umask can only be read by setting it
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+_NEW_FILE_MODE = 0o666 & ~_UMASK
+
+def save_shipments(ids, sfi_vectors, bitmasks=None):
+    """Writes shipments to SHIPMENTS_FILE as a NumPy structured array (id, sfi_vector, bitmask).
+
+    bitmasks are derived from sfi_vectors when not supplied.
+
+    The file is written to a temporary name and then moved into place, so concurrent
+    readers never see a partially written file.
+    """
+    id_width = max((len(shipment_id) for shipment_id in ids), default=1)
+    shipments = np.empty(len(ids), dtype=[("id", f"U{id_width}"), ("sfi_vector", "u8"), ("bitmask", "u4")])
+    shipments["id"] = ids
+    shipments["sfi_vector"] = sfi_vectors
+    shipments["bitmask"] = sfi_vectors_to_bitmasks(sfi_vectors) if bitmasks is None else bitmasks
+
+    target_dir = os.path.dirname(os.path.abspath(SHIPMENTS_FILE))
+    fd, temp_path = tempfile.mkstemp(dir=target_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, shipments)
+        # mkstemp creates the file as 0600; give it the mode a plain open() would have
+        os.chmod(temp_path, _NEW_FILE_MODE)
+        os.replace(temp_path, SHIPMENTS_FILE)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+    return len(shipments)
+
+# Per-group prime tables, in ATTRIBUTE_GROUPS value order, for vectorized generation
+_GROUP_PRIME_ARRAYS = [
+    np.array([PRIME_MAP[group][value] for value in values], dtype=np.uint64)
+    for group, values in ATTRIBUTE_GROUPS.items()
+]
+_GROUP_BIT_ARRAYS = [
+    np.array([1 << PRIME_BIT_INDEX[PRIME_MAP[group][value]] for value in values], dtype=np.uint32)
+    for group, values in ATTRIBUTE_GROUPS.items()
+]
+
 def generate_shipment_data(count=100):
     """Generates a specified number of random shipments and their SFI vectors."""
-    shipments = []
     log_message(f"Starting generation of {count} shipments.")
     start_time = time.time()
-    for i in range(count):
-        shipment_id = f"SHP{random.randint(10000, 99999):05d}{i:03d}"
-        details = {
-            group: random.choice(values)
-            for group, values in ATTRIBUTE_GROUPS.items()
-        }
-        sfi_vector = encode_shipment(details)
-        if sfi_vector is not None:
-            shipments.append({
-                "id": shipment_id,
-                "sfi_vector": sfi_vector,
-                # Optionally include details for easier debugging/verification
-                # "details": details
-            })
-        else:
-             log_message(f"Failed to encode shipment {i+1}, skipping.")
+    rng = np.random.default_rng()
+    # Pick one value per attribute group for all shipments at once; the drawn indices give
+    # both the prime to multiply in and the bit to set
+    sfi_vectors = np.ones(count, dtype=np.uint64)
+    bitmasks = np.zeros(count, dtype=np.uint32)
+    for group_primes, group_bits in zip(_GROUP_PRIME_ARRAYS, _GROUP_BIT_ARRAYS):
+        value_indices = rng.integers(0, len(group_primes), size=count)
+        sfi_vectors *= group_primes[value_indices]
+        bitmasks |= group_bits[value_indices]
+    id_suffixes = rng.integers(10000, 100000, size=count).tolist()
+    ids = [f"SHP{suffix:05d}{i:03d}" for i, suffix in enumerate(id_suffixes)]
 
     try:
-        with open(SHIPMENTS_FILE, "w") as f:
-            json.dump(shipments, f, indent=2)
+        saved_count = save_shipments(ids, sfi_vectors, bitmasks)
         end_time = time.time()
         duration = end_time - start_time
-        log_message(f"Successfully generated {len(shipments)} shipments to {SHIPMENTS_FILE}. Took {duration:.2f}s.")
-        return {"success": True, "count": len(shipments), "file": SHIPMENTS_FILE, "duration_seconds": duration}
+        log_message(f"Successfully generated {saved_count} shipments to {SHIPMENTS_FILE}. Took {duration:.2f}s.")
+        return {"success": True, "count": saved_count, "file": SHIPMENTS_FILE, "duration_seconds": duration}
     except IOError as e:
         log_message(f"Error writing shipments to {SHIPMENTS_FILE}: {e}")
         return {"success": False, "error": f"Could not write to {SHIPMENTS_FILE}: {e}"}
@@ -161,25 +334,13 @@ def generate_shipment_data(count=100):
 
 
 # --- Data Filtering ---
-def filter_shipment_data(criteria_json):
-    """Filters shipments from SHIPMENTS_FILE based on SFI criteria."""
-    log_message(f"Starting filtering with criteria: {criteria_json}")
-    start_time = time.time()
-
-    if not os.path.exists(SHIPMENTS_FILE):
-        log_message(f"Error: Shipments file '{SHIPMENTS_FILE}' not found for filtering.")
-        return {"success": False, "error": f"Shipments file '{SHIPMENTS_FILE}' not found. Please generate data first."}
-
-    try:
-        criteria = json.loads(criteria_json)
-    except json.JSONDecodeError as e:
-        log_message(f"Error decoding filter criteria JSON: {e}")
-        return {"success": False, "error": f"Invalid JSON in filter criteria: {e}"}
-
+def build_filter_vector(criteria):
+    """Builds the filter vector for a criteria dict. Returns (filter_vector, valid_criteria, error)."""
     filter_vector = 1
     valid_criteria = {}
     for group, value in criteria.items():
-        if group in PRIME_MAP and value in PRIME_MAP[group]:
+        # Non-string values (e.g. JSON lists) can't name an attribute value, and may not be hashable
+        if group in PRIME_MAP and isinstance(value, str) and value in PRIME_MAP[group]:
             prime = PRIME_MAP[group][value]
             filter_vector *= prime
             valid_criteria[group] = value
@@ -190,36 +351,82 @@ def filter_shipment_data(criteria_json):
     if filter_vector == 1 and valid_criteria:
          log_message("Filter vector is 1, but valid criteria were provided. This shouldn't happen.")
          # This case might indicate an issue, or just criteria that map to non-existent primes (which shouldn't happen with current setup)
-         return {"success": False, "error": "Internal error creating filter vector from valid criteria."}
+         return filter_vector, valid_criteria, "Internal error creating filter vector from valid criteria."
     elif filter_vector == 1:
         log_message("No valid filter criteria provided.")
-        return {"success": False, "error": "No valid filter criteria provided."}
-
+        return filter_vector, valid_criteria, "No valid filter criteria provided."
 
     log_message(f"Calculated filter vector: {filter_vector} for criteria: {valid_criteria}")
+    return filter_vector, valid_criteria, None
+
+# Memory-mapped SHIPMENTS_FILE, reused until the file's mtime or size changes
+_SHIPMENTS_CACHE = {"stamp": None, "data": None}
+_SHIPMENTS_CACHE_LOCK = threading.Lock()
+
+def load_shipments():
+    """Returns the shipments structured array from SHIPMENTS_FILE, reloading only when the file has changed.
+
+    The array is memory-mapped read-only, with "id", "sfi_vector" and "bitmask" fields.
+    """
+    with _SHIPMENTS_CACHE_LOCK:
+        stat = os.stat(SHIPMENTS_FILE)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if _SHIPMENTS_CACHE["stamp"] != stamp:
+            data = np.load(SHIPMENTS_FILE, mmap_mode="r")
+            if data.dtype.names is None or not {"id", "sfi_vector", "bitmask"} <= set(data.dtype.names):
+                raise ValueError(f"unexpected array layout {data.dtype}")
+            _SHIPMENTS_CACHE["stamp"] = stamp
+            _SHIPMENTS_CACHE["data"] = data
+            log_message(f"Loaded {len(data)} shipments from {SHIPMENTS_FILE} into cache.")
+        return _SHIPMENTS_CACHE["data"]
+
+def match_shipments(shipments, filter_vector):
+    """Returns the shipments whose SFI vector is divisible by filter_vector."""
+    # The core SFI filtering logic: since filter_vector is squarefree, divisibility is
+    # equivalent to every filter prime's bit being set in the shipment's bitmask.
+    filter_mask = np.uint32(sfi_vector_to_bitmask(filter_vector))
+    bitmasks = shipments["bitmask"]
+    matches = shipments[(bitmasks & filter_mask) == filter_mask]
+    return [
+        {"id": shipment_id, "sfi_vector": sfi_vector}
+        for shipment_id, sfi_vector in zip(matches["id"].tolist(), matches["sfi_vector"].tolist())
+    ]
+
+def filter_shipment_data(criteria_json):
+    """Filters shipments from SHIPMENTS_FILE based on SFI criteria."""
+    log_message(f"Starting filtering with criteria: {criteria_json}")
+    start_time = time.time()
+
+    if not os.path.exists(SHIPMENTS_FILE):
+        log_message(f"Error: Shipments file '{SHIPMENTS_FILE}' not found for filtering.")
+        return {"success": False, "error": f"Shipments file '{SHIPMENTS_FILE}' not found. Please generate data first."}
 
-    matching_shipments = []
     try:
-        with open(SHIPMENTS_FILE, "r") as f:
-            all_shipments = json.load(f)
-
-        for shipment in all_shipments:
-            if "sfi_vector" in shipment and isinstance(shipment["sfi_vector"], int):
-                 # The core SFI filtering logic: check divisibility
-                 if shipment["sfi_vector"] % filter_vector == 0:
-                     matching_shipments.append(shipment)
-            else:
-                log_message(f"Warning: Skipping shipment with missing or invalid 'sfi_vector': {shipment.get('id', 'Unknown ID')}")
+        criteria = json.loads(criteria_json)
+    except json.JSONDecodeError as e:
+        log_message(f"Error decoding filter criteria JSON: {e}")
+        return {"success": False, "error": f"Invalid JSON in filter criteria: {e}"}
 
+    if not isinstance(criteria, dict):
+        log_message(f"Error: Filter criteria must be a JSON object, got: {criteria_json}")
+        return {"success": False, "error": "Filter criteria must be a JSON object."}
+
+    filter_vector, valid_criteria, error = build_filter_vector(criteria)
+    if error:
+        return {"success": False, "error": error}
+
+    try:
+        shipments = load_shipments()
+        matching_shipments = match_shipments(shipments, filter_vector)
 
         end_time = time.time()
         duration = end_time - start_time
-        log_message(f"Filtering complete. Found {len(matching_shipments)} matching shipments out of {len(all_shipments)}. Took {duration:.2f}s.")
+        log_message(f"Filtering complete. Found {len(matching_shipments)} matching shipments out of {len(shipments)}. Took {duration:.2f}s.")
         return {
             "success": True,
             "criteria_used": valid_criteria,
             "filter_vector": filter_vector,
-            "total_checked": len(all_shipments),
+            "total_checked": len(shipments),
             "matches_found": len(matching_shipments),
             "results": matching_shipments, # Return matching shipment objects (id + sfi_vector)
             "duration_seconds": duration
@@ -227,13 +434,59 @@ def filter_shipment_data(criteria_json):
     except IOError as e:
         log_message(f"Error reading shipments from {SHIPMENTS_FILE}: {e}")
         return {"success": False, "error": f"Could not read {SHIPMENTS_FILE}: {e}"}
-    except json.JSONDecodeError as e:
-        log_message(f"Error parsing JSON from {SHIPMENTS_FILE}: {e}")
-        return {"success": False, "error": f"Invalid JSON in {SHIPMENTS_FILE}: {e}"}
+    except ValueError as e:
+        log_message(f"Error parsing shipment data from {SHIPMENTS_FILE}: {e}")
+        return {"success": False, "error": f"Invalid shipment data in {SHIPMENTS_FILE}: {e}"}
     except Exception as e:
         log_message(f"An unexpected error occurred during filtering: {e}")
         return {"success": False, "error": f"An unexpected error occurred during filtering: {e}"}
 
+def filter_shipment_data_batch(criteria_list):
+    """Filters shipments against several criteria dicts, reading SHIPMENTS_FILE only once."""
+    log_message(f"Starting batch filtering with {len(criteria_list)} criteria sets.")
+    start_time = time.time()
+
+    if not os.path.exists(SHIPMENTS_FILE):
+        log_message(f"Error: Shipments file '{SHIPMENTS_FILE}' not found for filtering.")
+        return {"success": False, "error": f"Shipments file '{SHIPMENTS_FILE}' not found. Please generate data first."}
+
+    try:
+        shipments = load_shipments()
+    except IOError as e:
+        log_message(f"Error reading shipments from {SHIPMENTS_FILE}: {e}")
+        return {"success": False, "error": f"Could not read {SHIPMENTS_FILE}: {e}"}
+    except ValueError as e:
+        log_message(f"Error parsing shipment data from {SHIPMENTS_FILE}: {e}")
+        return {"success": False, "error": f"Invalid shipment data in {SHIPMENTS_FILE}: {e}"}
+
+    results = []
+    for criteria in criteria_list:
+        if not isinstance(criteria, dict):
+            results.append({"success": False, "error": "Filter criteria must be a JSON object."})
+            continue
+        filter_vector, valid_criteria, error = build_filter_vector(criteria)
+        if error:
+            results.append({"success": False, "error": error})
+            continue
+        matching_shipments = match_shipments(shipments, filter_vector)
+        results.append({
+            "success": True,
+            "criteria_used": valid_criteria,
+            "filter_vector": filter_vector,
+            "matches_found": len(matching_shipments),
+            "results": matching_shipments
+        })
+
+    end_time = time.time()
+    duration = end_time - start_time
+    log_message(f"Batch filtering complete. Ran {len(results)} criteria sets over {len(shipments)} shipments. Took {duration:.2f}s.")
+    return {
+        "success": True,
+        "total_checked": len(shipments),
+        "results": results,
+        "duration_seconds": duration
+    }
+
 
 # --- Main Execution ---
 def main():
@@ -249,7 +502,7 @@ def main():
 
     # Filter command
     parser_filter = subparsers.add_parser("filter", help="Filter shipments based on criteria.")
-    parser_filter.add_argument("-cr", "--criteria", type=str, required=True, help='JSON string of filter criteria (e.g., '{"origin": "New York", "status": "In Transit"}')')
+    parser_filter.add_argument("-cr", "--criteria", type=str, required=True, help='JSON string of filter criteria (e.g., \'{"origin": "New York", "status": "In Transit"}\')')
 
     # Decode command
     parser_decode = subparsers.add_parser("decode", help="Decode an SFI vector.")
@@ -270,11 +523,7 @@ def main():
         elif args.command == "filter":
             result = filter_shipment_data(args.criteria)
         elif args.command == "decode":
-            decoded_data = decode_sfi_vector(args.vector)
-            if "error" in decoded_data:
-                 result = {"success": False, "error": decoded_data["error"], "vector": args.vector}
-            else:
-                 result = {"success": True, "vector": args.vector, "decoded": decoded_data}
+            result = decode_vector_result(args.vector)
         else:
              # Should not happen because subparsers are required
              result = {"success": False, "error": f"Unknown command: {args.command}"}
@@ -291,8 +540,13 @@ def main():
         sys.exit(1) # Important for subprocess error checking
 
 
-    # Print result as JSON to stdout for Flask app
-    print(json.dumps(result, indent=2)) # Use indent for easier debugging if run manually
+    # Print result as JSON to stdout
+    try:
+        output = orjson.dumps(result, option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE) # Indented for manual use
+    except orjson.JSONEncodeError:
+        # orjson rejects integers beyond 64 bits (e.g. an oversized vector echoed back)
+        output = (json.dumps(result, indent=2) + "\n").encode()
+    sys.stdout.buffer.write(output)
     log_message(f"Command '{args.command}' finished. Success: {result.get('success', False)}")
 
 if __name__ == "__main__":
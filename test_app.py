@@ -0,0 +1,37 @@
+"""Request-handling checks for the Flask routes."""
+import pytest
+
+import app as sfi_app
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return sfi_app.app.test_client()
+
+
+def test_decode_rejects_overlong_digit_string(client):
+    # int() refuses digit strings beyond sys.get_int_max_str_digits()
+    response = client.post('/decode', data={'vector': '9' * 5000})
+    assert response.status_code == 400
+    assert response.json['success'] is False
+
+
+def test_decode_rejects_non_ascii_digits(client):
+    response = client.post('/decode', data={'vector': '²'})
+    assert response.status_code == 400
+
+
+def test_decode_batch_reports_bad_items_per_item(client):
+    response = client.post('/decode_batch', json={'vectors': ['9' * 5000, '²', '30', 2689622]})
+    assert response.status_code == 200
+    results = response.json['results']
+    assert [r['success'] for r in results] == [False, False, True, True]
+    assert results[2]['decoded']['origin'] == 'Chicago'
+    assert results[3]['decoded']['carrier'] == 'PrimeShip'
+
+
+def test_decode_batch_returns_batch_envelope(client):
+    response = client.post('/decode_batch', json={'vectors': [30]})
+    assert response.json['success'] is True
+    assert 'duration_seconds' in response.json
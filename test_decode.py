@@ -0,0 +1,67 @@
+"""Regression checks for SFI vector decoding against plain trial division."""
+import itertools
+
+import sfi_cli
+
+
+def trial_division_decode(sfi_vector):
+    """Reference decoder: trial division by every prime in SORTED_PRIMES."""
+    decoded_attributes = {}
+    temp_vector = sfi_vector
+    for prime in sfi_cli.SORTED_PRIMES:
+        if temp_vector % prime == 0:
+            attribute_info = sfi_cli.REVERSE_PRIME_MAP[prime]
+            decoded_attributes[attribute_info["group"]] = attribute_info["value"]
+            while temp_vector % prime == 0:
+                temp_vector //= prime
+    if temp_vector != 1:
+        decoded_attributes["warning"] = f"Vector {sfi_vector} contains unrecognized factors or is incomplete. Remainder: {temp_vector}"
+    for group in sfi_cli.ATTRIBUTE_GROUPS.keys():
+        if group not in decoded_attributes:
+            decoded_attributes[group] = "Unknown"
+    return decoded_attributes
+
+
+def sample_vectors():
+    """Well-formed shipment vectors plus prime powers, unknown factors and values of 2**64 and above."""
+    shipment_vectors = [
+        sfi_cli.encode_shipment(dict(zip(sfi_cli.ATTRIBUTE_GROUPS, values)))
+        for values in itertools.product(*sfi_cli.ATTRIBUTE_GROUPS.values())
+    ]
+    prime_powers = [prime ** exponent for prime in sfi_cli.SORTED_PRIMES for exponent in (1, 2, 5)]
+    prime_powers += [2 ** 10 * 3 ** 4 * 79 ** 3, 11 ** 2 * 29 * 43 ** 3 * 67 * 79 ** 2]
+    unknown_factors = [1, 83, 97, 2 * 83, 3 * 89 * 97, 2 * 5 * 7 * 7 * 101, 79 * 83, 13 * 7919, 47 * 1000003]
+    large = [
+        2 ** 64, 2 ** 64 + 1, 2 ** 64 - 1, 2 ** 70 * 79,
+        11 * 29 * 43 * 67 * 79 * (2 ** 61 - 1) * (2 ** 31 - 1),
+        2 ** 100 * 3 ** 50 * 83 ** 20, 10 ** 40,
+    ]
+    return shipment_vectors + prime_powers + unknown_factors + large + list(range(1, 2000))
+
+
+def test_decode_matches_trial_division():
+    for sfi_vector in sample_vectors():
+        decoded = sfi_cli.decode_sfi_vector(sfi_vector)
+        expected = trial_division_decode(sfi_vector)
+        # Compare items in order too, since the JSON output preserves key order
+        assert list(decoded.items()) == list(expected.items()), sfi_vector
+
+
+def test_decode_rejects_invalid_vectors():
+    for sfi_vector in (0, -5, True, False, "30", 3.0, None, [30]):
+        assert "error" in sfi_cli.decode_sfi_vector(sfi_vector)
+
+
+def test_batch_decode_matches_per_vector_decode():
+    vectors = sample_vectors()
+    # Repeats exercise the per-batch deduplication; invalid items must be reported in place
+    vectors = vectors + vectors[:500] + [0, -1, True, "x", None, [30]]
+    assert sfi_cli.decode_sfi_vectors(vectors) == [sfi_cli.decode_sfi_vector(v) for v in vectors]
+    assert sfi_cli.decode_vector_results(vectors) == [sfi_cli.decode_vector_result(v) for v in vectors]
+
+
+def test_batch_decode_returns_independent_dicts():
+    decoded = sfi_cli.decode_sfi_vectors([30, 30])
+    decoded[0]["origin"] = "Changed"
+    assert decoded[1]["origin"] == "Chicago"
+    assert sfi_cli.decode_sfi_vector(30)["origin"] == "Chicago"
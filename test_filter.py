@@ -0,0 +1,59 @@
+"""Regression checks for shipment filtering against plain divisibility."""
+import json
+
+import numpy as np
+import pytest
+
+import sfi_cli
+
+CRITERIA = [
+    {"origin": "Chicago"},
+    {"destination": "Tokyo", "carrier": "PrimeShip"},
+    {"origin": "Miami", "status": "Delayed", "priority": "Express"},
+    {"origin": "New York", "destination": "Berlin", "carrier": "CargoFast", "status": "Pending", "priority": "Overnight"},
+]
+
+
+@pytest.fixture
+def saved_rows(tmp_path, monkeypatch):
+    """Generates shipments into a temporary directory and returns the saved (id, sfi_vector) rows."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setitem(sfi_cli._SHIPMENTS_CACHE, "stamp", None)
+    assert sfi_cli.generate_shipment_data(5000)["success"]
+    shipments = np.load(sfi_cli.SHIPMENTS_FILE)
+    return list(zip(shipments["id"].tolist(), shipments["sfi_vector"].tolist()))
+
+
+def expected_matches(rows, criteria):
+    filter_vector = 1
+    for group, value in criteria.items():
+        filter_vector *= sfi_cli.PRIME_MAP[group][value]
+    return [{"id": shipment_id, "sfi_vector": sfi_vector} for shipment_id, sfi_vector in rows if sfi_vector % filter_vector == 0]
+
+
+def test_filter_matches_divisibility(saved_rows):
+    for criteria in CRITERIA:
+        result = sfi_cli.filter_shipment_data(json.dumps(criteria))
+        assert result["success"]
+        assert result["total_checked"] == len(saved_rows)
+        assert result["results"] == expected_matches(saved_rows, criteria)
+
+
+def test_filter_batch_matches_divisibility(saved_rows):
+    result = sfi_cli.filter_shipment_data_batch(CRITERIA + [{"origin": ["x"]}])
+    assert result["success"]
+    for criteria, item in zip(CRITERIA, result["results"]):
+        assert item["results"] == expected_matches(saved_rows, criteria)
+    assert result["results"][-1]["success"] is False
+
+
+def test_saved_bitmasks_match_vectors(saved_rows):
+    shipments = np.load(sfi_cli.SHIPMENTS_FILE)
+    assert shipments["bitmask"].tolist() == [sfi_cli.sfi_vector_to_bitmask(v) for _, v in saved_rows]
+
+
+def test_bitmask_conversion_falls_back_beyond_64_bits():
+    vectors = [1, 30, 11 * 29 * 43 * 67 * 79, 2 ** 64 - 1, 2 ** 64, 2 ** 70 * 79, 10 ** 40]
+    expected = [sfi_cli.sfi_vector_to_bitmask(v) for v in vectors]
+    assert sfi_cli.sfi_vectors_to_bitmasks(vectors).tolist() == expected
+    assert sfi_cli.sfi_vectors_to_bitmasks(vectors[:4]).tolist() == expected[:4]